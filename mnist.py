@@ -101,34 +101,45 @@ class ConvNet:
         self.w_conv1 = weight_variable([5, 5, 1, 32])
         self.b_conv1 = bias_variable([32])
 
-        x_image = tf.reshape(x, [-1, 28, 28, 1])
-        h_conv1 = tf.nn.relu(conv2d(x_image, self.w_conv1) + self.b_conv1)
-        h_pool1 = max_pool_2x2(h_conv1)
-
         self.w_conv2 = weight_variable([5, 5, 32, 64])
         self.b_conv2 = bias_variable([64])
 
-        h_conv2 = tf.nn.relu(conv2d(h_pool1, self.w_conv2) + self.b_conv2)
-        h_pool2 = max_pool_2x2(h_conv2)
-
         self.w_fc1 = weight_variable([7 * 7 * 64, 1024])
         self.b_fc1 = bias_variable([1024])
 
-        h_pool2_flat = tf.reshape(h_pool2, [-1, 7 * 7 * 64])
-        h_fc1 = tf.nn.relu(tf.matmul(h_pool2_flat, self.w_fc1) + self.b_fc1)
-        h_fc1_drop = tf.nn.dropout(h_fc1, keep_prob)
-
         self.w_fc2 = weight_variable([1024, 10])
         self.b_fc2 = bias_variable([10])
 
-        self.y = tf.matmul(h_fc1_drop, self.w_fc2) + self.b_fc2
+        self.vars = [self.w_conv1, self.b_conv1, self.w_conv2, self.b_conv2,
+                     self.w_fc1, self.b_fc1, self.w_fc2, self.b_fc2]
+
+        self.y = self.apply(x, keep_prob)
 
         correct_prediction = tf.equal(
             tf.argmax(self.y, 1), tf.argmax(y_, 1))
         self.accuracy = tf.reduce_mean(tf.cast(correct_prediction, tf.float32))
 
-        self.vars = [self.w_conv1, self.b_conv1, self.w_conv2, self.b_conv2,
-                     self.w_fc1, self.b_fc1, self.w_fc2, self.b_fc2]
+    def apply(self, x, keep_prob):
+        """
+        Returns the logits of a forward pass of this ConvNet applied to the
+        input batch <x>, reusing this ConvNet's Variables.
+
+        <x> is the batch's images, a tf.float32 Tensor with shape [None, 784].
+        <keep_prob> is the dropout keep probability, a tf.float32 Tensor with
+        shape [].
+        """
+        x_image = tf.reshape(x, [-1, 28, 28, 1])
+        h_conv1 = tf.nn.relu(conv2d(x_image, self.w_conv1) + self.b_conv1)
+        h_pool1 = max_pool_2x2(h_conv1)
+
+        h_conv2 = tf.nn.relu(conv2d(h_pool1, self.w_conv2) + self.b_conv2)
+        h_pool2 = max_pool_2x2(h_conv2)
+
+        h_pool2_flat = tf.reshape(h_pool2, [-1, 7 * 7 * 64])
+        h_fc1 = tf.nn.relu(tf.matmul(h_pool2_flat, self.w_fc1) + self.b_fc1)
+        h_fc1_drop = tf.nn.dropout(h_fc1, keep_prob)
+
+        return tf.matmul(h_fc1_drop, self.w_fc2) + self.b_fc2
 
     def initialize_variables(self) -> None:
         """
@@ -3,19 +3,107 @@ A convolutional neural network for MNIST that is compatible with
 population-based training.
 """
 
-from typing import Any, Iterable, List, Tuple, Callable
+from typing import Any, Dict, Iterable, List, Tuple, Callable
+import contextlib
 import math
-import random
 import os
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """
+        A no-op replacement for numba.njit, used when Numba is not installed.
+        """
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
 from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection
 from matplotlib.lines import Line2D
 import matplotlib.pyplot as plt
+import numpy as np
 import tensorflow as tf
 from pbt import Hyperparameter, HyperparamsUpdate, HyperparamsGraph
 from mnist import ConvNet as MNISTConvNet, MNIST_TRAIN_SIZE, MNIST_TEST_SIZE, MNIST_TEST_BATCH_SIZE,\
     get_mnist_data
 
 
+_shared_train_iterator = None
+_shared_train_handle: bytes = None
+_shared_test_batches = None
+
+
+def _get_shared_data(sess: tf.Session):
+    """
+    Returns the process-wide shared MNIST data as a tuple of the training
+    iterator's string handle and the batched testing Dataset, creating them if
+    necessary.
+
+    The training pipeline is built once and shared by every ConvNet in the
+    process, so all ConvNets must share the Session <sess>. Each ConvNet draws
+    its own identically-distributed batches from the single shared stream.
+    """
+    global _shared_train_iterator, _shared_train_handle, _shared_test_batches
+    if _shared_train_iterator is None:
+        train_data, test_data = get_mnist_data()
+        train_batches = train_data.cache().shuffle(MNIST_TRAIN_SIZE).batch(50).repeat()\
+            .prefetch(tf.data.experimental.AUTOTUNE)
+        _shared_train_iterator = train_batches.make_one_shot_iterator()
+        _shared_train_handle = sess.run(_shared_train_iterator.string_handle())
+        # Not cached: the eval loop pulls exactly the number of full batches
+        # and never hits end-of-sequence, so a cache would never complete and
+        # would be discarded on every iterator reset
+        _shared_test_batches = test_data.batch(MNIST_TEST_BATCH_SIZE)
+    return _shared_train_handle, _shared_test_batches
+
+
+# If True, Optimizers used by ConvNets will be wrapped with TensorFlow's
+# automatic mixed precision graph rewrite, which runs the convnet's forward
+# and backward math in float16 with loss scaling while keeping Variables in
+# float32. Disabled by default since the win requires a GPU with fast float16
+# support.
+USE_MIXED_PRECISION = False
+
+# If True, the forward/backward/eval subgraphs of new ConvNets will be built
+# inside an XLA JIT scope, fusing their many small kernels into a few compiled
+# ones. Disabled by default since XLA helps less on CPU-only runs.
+USE_XLA = False
+
+
+def _jit_scope():
+    """
+    Returns a context manager that requests XLA JIT compilation for the ops
+    created inside it if USE_XLA is True, and has no effect otherwise.
+    """
+    if USE_XLA:
+        return tf.xla.experimental.jit_scope()
+    return contextlib.nullcontext()
+
+
+def _make_assign_callable(sess: tf.Session, vars: List[tf.Variable]) -> Callable:
+    """
+    Returns a Callable that assigns new values to all of <vars> in a single
+    Session run when called with one value per Variable, in order.
+    """
+    placeholders = [tf.placeholder(var.dtype.base_dtype, var.shape) for var in vars]
+    assign_all = tf.group(*[var.assign(ph) for var, ph in zip(vars, placeholders)])
+    return sess.make_callable(assign_all, feed_list=placeholders)
+
+
+@njit(cache=True)
+def truncation_selection(metrics: np.ndarray, frac: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ranks <metrics> in increasing order, with ties broken in favor of lower
+    indices, and returns the indices of the bottom and top <frac> fractions as
+    a pair of equal-length arrays.
+
+    Compiled with Numba when it is installed.
+    """
+    order = np.argsort(metrics, kind='mergesort')
+    cutoff = int(math.ceil(frac * len(order)))
+    return order[:cutoff], order[len(order) - cutoff:]
+
+
 class FloatHyperparameter(Hyperparameter):
     """
     A type of Hyperparameter with a single floating-point value.
@@ -26,6 +114,10 @@ class FloatHyperparameter(Hyperparameter):
     factor: float
     min_value: float
     max_value: float
+    _cached_value: float
+    _assign_callable: Callable
+    _perturb_callable: Callable
+    _copy_ops: Dict['FloatHyperparameter', tf.Operation]
 
     def _limited(self, value: float) -> float:
         if self.min_value is not None:
@@ -52,7 +144,40 @@ class FloatHyperparameter(Hyperparameter):
         self.factor = factor
         self.min_value = min_value
         self.max_value = max_value
-        self.value = tf.Variable(self._limited(value_setter()), trainable=False)
+        initial_value = self._limited(value_setter())
+        self.value = tf.Variable(initial_value, trainable=False)
+        self._cached_value = initial_value
+        self._assign_callable = _make_assign_callable(graph.sess, [self.value])
+        factor_ph = tf.placeholder(self.value.dtype.base_dtype, [])
+        perturbed = self.value * factor_ph
+        if min_value is not None:
+            perturbed = tf.maximum(perturbed, min_value)
+        if max_value is not None:
+            perturbed = tf.minimum(perturbed, max_value)
+        self._perturb_callable = graph.sess.make_callable(self.value.assign(perturbed),
+                                                          feed_list=[factor_ph])
+        self._copy_ops = {}
+
+    def get_copy_ops(self, source: 'FloatHyperparameter') -> List[tf.Operation]:
+        """
+        Returns a list of TensorFlow Operations that, when run, assign
+        <source>'s value Variable directly to this FloatHyperparameter's,
+        building and caching the assign op on first use. <source>'s graph
+        must share this FloatHyperparameter's Session. finish_copy(<source>)
+        must be called after the Operations are run.
+        """
+        op = self._copy_ops.get(source)
+        if op is None:
+            op = self.value.assign(source.value)
+            self._copy_ops[source] = op
+        return [op]
+
+    def finish_copy(self, source: 'FloatHyperparameter') -> None:
+        """
+        Brings this FloatHyperparameter's Python-side state up to date after
+        the Operations from get_copy_ops(<source>) have been run.
+        """
+        self._cached_value = source._cached_value
 
     def __str__(self) -> str:
         return str(self.get_value())
@@ -61,18 +186,21 @@ class FloatHyperparameter(Hyperparameter):
         self.graph.sess.run(self.value.initializer)
 
     def get_value(self) -> float:
-        return self.graph.sess.run(self.value)
+        return self._cached_value
+
+    def get_recorded_value(self) -> float:
+        return self._cached_value
 
     def set_value(self, value: float) -> None:
-        self.value.load(value, self.graph.sess)
+        self._assign_callable(value)
+        self._cached_value = value
 
     def perturb(self) -> None:
-        value = self.get_value()
-        if random.random() < 0.5:
-            value *= self.factor
+        if self.graph.rng.random() < 0.5:
+            factor = self.factor
         else:
-            value /= self.factor
-        self.set_value(self._limited(value))
+            factor = 1 / self.factor
+        self._cached_value = float(self._perturb_callable(factor))
 
     def resample(self) -> None:
         self.set_value(self._limited(self.value_setter()))
@@ -88,17 +216,23 @@ class OptimizerInfo:
     vars: List[tf.Variable]
     hyperparams: List[Hyperparameter]
 
-    def __init__(self, optimizer: tf.train.Optimizer,
-                 to_minimize, hyperparams: List[Hyperparameter]) -> None:
+    def __init__(self, optimizer: tf.train.Optimizer, to_minimize,
+                 hyperparams: List[Hyperparameter], grads_and_vars: List[Tuple]=None) -> None:
         """
         Creates a new OptimizerInfo for <optimizer>.
 
         <to_minimize> is a TensorFlow Tensor that <optimizer> should be used to
         minimize, and <hyperparams> is a list of all of the Hyperparameters
-        that affect <optimizer>'s behavior.
+        that affect <optimizer>'s behavior. If <grads_and_vars> is not None, it
+        is a precomputed list of (gradient, Variable) pairs for <to_minimize>
+        that <optimizer> will apply instead of building its own backward
+        subgraph.
         """
         self.optimizer = optimizer
-        self.minimizer = optimizer.minimize(to_minimize)
+        if grads_and_vars is None:
+            self.minimizer = optimizer.minimize(to_minimize)
+        else:
+            self.minimizer = optimizer.apply_gradients(grads_and_vars)
         self.vars = optimizer.variables()
         self.hyperparams = hyperparams
 
@@ -111,67 +245,146 @@ class OptimizerHyperparameter(Hyperparameter):
     opt_info: List[OptimizerInfo]
     opt_index: int
     vary_opt: bool
+    _to_minimize: Any
+    _grads_and_vars: List[Tuple]
+    _opt_builders: List[Tuple[Callable[[], tf.train.Optimizer], List[Hyperparameter]]]
+    _vars_callables: Dict[int, Callable]
+    _assign_callables: Dict[int, Callable]
+    _copy_ops: Dict[Tuple['OptimizerHyperparameter', int], List[tf.Operation]]
 
     def _set_sub_hyperparams_unused(self, unused: bool) -> None:
-        for hyperparam in self.opt_info[self.opt_index].hyperparams:
+        for hyperparam in self._opt_builders[self.opt_index][1]:
             hyperparam.unused = unused
 
-    def __init__(self, graph: HyperparamsGraph, to_minimize, vary_opt: bool) -> None:
+    def __init__(self, graph: HyperparamsGraph, to_minimize,
+                 var_list: List[tf.Variable], vary_opt: bool) -> None:
         """
         Creates a new OptimizerHyperparameter of <graph> with Optimizers that
-        can be used to minimize the TensorFlow Tensor <to_minimize>.
+        can be used to minimize the TensorFlow Tensor <to_minimize> with
+        respect to the Variables in <var_list>.
 
         If <vary_opt> is True, the Optimizer used will be sampled at random and
         can be perturbed. Otherwise, it will always be an AdamOptimizer.
+
+        The gradients of <to_minimize> are computed by a single backward
+        subgraph that all of the Optimizers share, and each Optimizer, along
+        with its slot Variables, is only built the first time it is actually
+        used.
         """
         super().__init__('Optimizer', graph, False)
-        self.opt_info = []
+        self._to_minimize = to_minimize
+        if USE_MIXED_PRECISION:
+            # Loss scaling requires each Optimizer to compute its own scaled
+            # gradients, so they cannot share a backward subgraph
+            self._grads_and_vars = None
+        else:
+            with _jit_scope():
+                grads = tf.gradients(to_minimize, var_list)
+            self._grads_and_vars = list(zip(grads, var_list))
+        self._vars_callables = {}
+        self._assign_callables = {}
+        self._copy_ops = {}
+        rng = graph.rng
         learning_rate = FloatHyperparameter('Learning rate', self.graph, True,
-                                            lambda: 10 ** random.uniform(-6, 0), 1.2, 10 ** -6, 1)
-        # GradientDescentOptimizer
-        optimizer = tf.train.GradientDescentOptimizer(learning_rate.value)
-        self.opt_info.append(OptimizerInfo(optimizer, to_minimize, [learning_rate]))
-        # AdagradOptimizer
-        optimizer = tf.train.AdagradOptimizer(learning_rate.value, 0.01)
-        self.opt_info.append(OptimizerInfo(optimizer, to_minimize, [learning_rate]))
-        # MomentumOptimizer
+                                            lambda: 10 ** rng.uniform(-6, 0), 1.2, 10 ** -6, 1)
         momentum = FloatHyperparameter('Momentum', self.graph, True,
-                                       lambda: random.uniform(0, 1), 1.2, 0, 1)
-        optimizer = tf.train.MomentumOptimizer(learning_rate.value, momentum.value)
-        self.opt_info.append(OptimizerInfo(optimizer, to_minimize, [learning_rate, momentum]))
-        # AdamOptimizer
-        optimizer = tf.train.AdamOptimizer(learning_rate.value)
-        self.opt_info.append(OptimizerInfo(optimizer, to_minimize, [learning_rate]))
+                                       lambda: rng.uniform(0, 1), 1.2, 0, 1)
+        self._opt_builders = [
+            (lambda: tf.train.GradientDescentOptimizer(learning_rate.value), [learning_rate]),
+            (lambda: tf.train.AdagradOptimizer(learning_rate.value, 0.01), [learning_rate]),
+            (lambda: tf.train.MomentumOptimizer(learning_rate.value, momentum.value),
+             [learning_rate, momentum]),
+            (lambda: tf.train.AdamOptimizer(learning_rate.value), [learning_rate]),
+        ]
+        self.opt_info = [None] * len(self._opt_builders)
         if vary_opt:
-            self.opt_index = random.randrange(len(self.opt_info))
+            self.opt_index = rng.randrange(len(self._opt_builders))
         else:
             self.opt_index = 3
+        self._get_info(self.opt_index)
         self._set_sub_hyperparams_unused(False)
         self.vary_opt = vary_opt
 
+    def _get_info(self, opt_index: int) -> OptimizerInfo:
+        """
+        Returns the OptimizerInfo for Optimizer number <opt_index>, building it
+        and initializing its Optimizer's Variables if it has not been built
+        yet.
+        """
+        info = self.opt_info[opt_index]
+        if info is None:
+            builder, hyperparams = self._opt_builders[opt_index]
+            optimizer = builder()
+            if USE_MIXED_PRECISION:
+                optimizer = tf.train.experimental.enable_mixed_precision_graph_rewrite(optimizer)
+            with _jit_scope():
+                info = OptimizerInfo(optimizer, self._to_minimize, hyperparams,
+                                     self._grads_and_vars)
+            self.opt_info[opt_index] = info
+            self.graph.sess.run([var.initializer for var in info.vars])
+        return info
+
     def __str__(self) -> str:
         return self.opt_info[self.opt_index].optimizer.__class__.__name__
 
     def initialize_variables(self) -> None:
-        self.graph.sess.run([var.initializer for info in self.opt_info for var in info.vars])
+        self.graph.sess.run([var.initializer for info in self.opt_info
+                             if info is not None for var in info.vars])
 
     def get_value(self):
-        return (self.opt_index, self.graph.sess.run(self.opt_info[self.opt_index].vars), self.vary_opt)
+        vars_callable = self._vars_callables.get(self.opt_index)
+        if vars_callable is None:
+            vars_callable = self.graph.sess.make_callable(self.opt_info[self.opt_index].vars)
+            self._vars_callables[self.opt_index] = vars_callable
+        return (self.opt_index, vars_callable(), self.vary_opt)
 
     def set_value(self, value) -> None:
         opt_index, var_values, vary_opt = value
         self._set_sub_hyperparams_unused(True)
+        info = self._get_info(opt_index)
         self.opt_index = opt_index
-        vars = self.opt_info[opt_index].vars
-        for i in range(len(vars)):
-            vars[i].load(var_values[i], self.graph.sess)
+        assign_callable = self._assign_callables.get(opt_index)
+        if assign_callable is None:
+            assign_callable = _make_assign_callable(self.graph.sess, info.vars)
+            self._assign_callables[opt_index] = assign_callable
+        assign_callable(*var_values)
         self._set_sub_hyperparams_unused(False)
         self.vary_opt = vary_opt
 
+    def get_copy_ops(self, source: 'OptimizerHyperparameter') -> List[tf.Operation]:
+        """
+        Returns a list of TensorFlow Operations that, when run, assign the
+        slot Variables of <source>'s current Optimizer directly to this
+        OptimizerHyperparameter's corresponding ones, building this
+        OptimizerHyperparameter's matching Optimizer if necessary and caching
+        the assign ops on first use. <source>'s graph must share this
+        OptimizerHyperparameter's Session. finish_copy(<source>) must be
+        called after the Operations are run.
+        """
+        opt_index = source.opt_index
+        info = self._get_info(opt_index)
+        key = (source, opt_index)
+        ops = self._copy_ops.get(key)
+        if ops is None:
+            source_vars = source.opt_info[opt_index].vars
+            ops = [var.assign(source_var) for var, source_var in zip(info.vars, source_vars)]
+            self._copy_ops[key] = ops
+        return ops
+
+    def finish_copy(self, source: 'OptimizerHyperparameter') -> None:
+        """
+        Brings this OptimizerHyperparameter's Python-side state up to date
+        after the Operations from get_copy_ops(<source>) have been run.
+        """
+        self._set_sub_hyperparams_unused(True)
+        self.opt_index = source.opt_index
+        self._set_sub_hyperparams_unused(False)
+        self.vary_opt = source.vary_opt
+
     def _switch_to_opt(self, opt_index: int):
         self._set_sub_hyperparams_unused(True)
+        info = self._get_info(opt_index)
         self.opt_index = opt_index
-        info = self.opt_info[self.opt_index]
         self.graph.sess.run([var.initializer for var in info.vars])
         for hyperparam in info.hyperparams:
             hyperparam.resample()
@@ -181,11 +394,11 @@ class OptimizerHyperparameter(Hyperparameter):
         if self.vary_opt:
             num_opts = len(self.opt_info)
             if num_opts >= 2:
-                self._switch_to_opt((self.opt_index + random.randrange(1, num_opts)) % num_opts)
+                self._switch_to_opt((self.opt_index + self.graph.rng.randrange(1, num_opts)) % num_opts)
 
     def resample(self) -> None:
         if self.vary_opt:
-            self._switch_to_opt(random.randrange(len(self.opt_info)))
+            self._switch_to_opt(self.graph.rng.randrange(len(self.opt_info)))
 
     def get_current_minimizer(self) -> tf.Operation:
         """
@@ -201,12 +414,19 @@ class ConvNet(HyperparamsGraph):
     cross entropy.
     """
 
-    train_next: Any
-    test_next: Any
+    handle: Any
+    train_handle: bytes
+    test_iterator: Any
     net: MNISTConvNet
     optimizer: OptimizerHyperparameter
     keep_prob: FloatHyperparameter
     accuracy: float
+    _train_callables: Dict[int, Callable]
+    _eval_total: Any
+    _eval_callable: Callable
+    _assign_net_vars: Callable
+    _copy_ops: Dict['ConvNet', List[tf.Operation]]
+    _fused_copy_ops: Dict[Tuple['ConvNet', int], tf.Operation]
 
     def __init__(self, num: int, sess: tf.Session, vary_opt: bool) -> None:
         """
@@ -222,20 +442,39 @@ class ConvNet(HyperparamsGraph):
         before any ConvNets are initialized.
         """
         super().__init__(num, sess)
-        train_data, test_data = get_mnist_data()
-        self.train_next = train_data\
-            .shuffle(MNIST_TRAIN_SIZE).batch(50).repeat().make_one_shot_iterator().get_next()
-        self.test_iterator = test_data.batch(MNIST_TEST_BATCH_SIZE).make_initializable_iterator()
-        self.test_next = self.test_iterator.get_next()
-        self.x = tf.placeholder(tf.float32, [None, 784])
-        self.y_ = tf.placeholder(tf.int32, [None])
-        one_hot_y_ = tf.one_hot(self.y_, 10)
-        self.keep_prob = FloatHyperparameter('Keep probability', self, False,
-                                             lambda: random.uniform(0.1, 1), 1.2, 0.1, 1)
-        self.net = MNISTConvNet(sess, self.x, one_hot_y_, self.keep_prob.value)
-        cross_entropy = tf.reduce_mean(
-            tf.nn.softmax_cross_entropy_with_logits_v2(labels=one_hot_y_, logits=self.net.y))
-        self.optimizer = OptimizerHyperparameter(self, cross_entropy, vary_opt)
+        self.train_handle, test_batches = _get_shared_data(sess)
+        # Namespace this ConvNet's subgraph so the population shares one
+        # TensorFlow graph and Session without name collisions
+        with tf.variable_scope('graph_%d' % num):
+            self.test_iterator = test_batches.make_initializable_iterator()
+            self.handle = tf.placeholder(tf.string, [])
+            iterator = tf.data.Iterator.from_string_handle(
+                self.handle, _shared_train_iterator.output_types, _shared_train_iterator.output_shapes)
+            x, y_ = iterator.get_next()
+            one_hot_y_ = tf.one_hot(y_, 10)
+            self.keep_prob = FloatHyperparameter('Keep probability', self, False,
+                                                 lambda: self.rng.uniform(0.1, 1), 1.2, 0.1, 1)
+            with _jit_scope():
+                self.net = MNISTConvNet(sess, x, one_hot_y_, self.keep_prob.value)
+                cross_entropy = tf.reduce_mean(
+                    tf.nn.softmax_cross_entropy_with_logits_v2(labels=one_hot_y_, logits=self.net.y))
+                self.optimizer = OptimizerHyperparameter(self, cross_entropy, self.net.vars, vary_opt)
+            self._train_callables = {}
+            self._assign_net_vars = _make_assign_callable(sess, self.net.vars)
+            self._copy_ops = {}
+            self._fused_copy_ops = {}
+
+            def eval_batch(i, correct_count):
+                test_x, test_y_ = self.test_iterator.get_next()
+                test_y = self.net.apply(test_x, 1.0)
+                correct = tf.equal(tf.argmax(test_y, 1), tf.cast(test_y_, tf.int64))
+                return i + 1, correct_count + tf.reduce_sum(tf.cast(correct, tf.int32))
+
+            num_test_batches = MNIST_TEST_SIZE // MNIST_TEST_BATCH_SIZE
+            with _jit_scope():
+                _, self._eval_total = tf.while_loop(lambda i, correct_count: i < num_test_batches,
+                                                    eval_batch, [0, 0], back_prop=False)
+        self._eval_callable = sess.make_callable(self._eval_total)
         self.accuracy = None
         self.value = None
 
@@ -247,38 +486,92 @@ class ConvNet(HyperparamsGraph):
         if self.value is None:
             self.value = (self.step_num, self.sess.run(self.net.vars),
                           [hyperparam.get_value() for hyperparam in self.hyperparams],
-                          self.last_update, self.accuracy)
+                          list(self.update_history), self.accuracy)
         return self.value
 
+    def get_summary(self):
+        """
+        Returns this ConvNet's value as returned by get_value(), except with
+        None in place of the weight Variable values, skipping the pull of the
+        weights out of the Session when the caller only needs the training
+        bookkeeping.
+        """
+        if self.value is not None:
+            return self.value
+        return (self.step_num, None,
+                [hyperparam.get_value() for hyperparam in self.hyperparams],
+                list(self.update_history), self.accuracy)
+
     def set_value(self, value) -> None:
-        step_num, var_values, hyperparam_values, last_update, accuracy = value
+        step_num, var_values, hyperparam_values, update_history, accuracy = value
         self.step_num = step_num
-        for i in range(len(self.net.vars)):
-            self.net.vars[i].load(var_values[i], self.sess)
+        self._assign_net_vars(*var_values)
         for i in range(len(self.hyperparams)):
             self.hyperparams[i].set_value(hyperparam_values[i])
-        self.last_update = last_update
+        self.update_history = list(update_history)
         self.accuracy = accuracy
         self.value = value
 
+    def get_copy_ops(self, other: 'ConvNet') -> List[tf.Operation]:
+        """
+        Returns a list of TensorFlow Operations that, when run, copy <other>'s
+        weights, optimizer state, and hyperparameter values into this
+        ConvNet's Variables. finish_copy(<other>) must be called after the
+        Operations are run.
+
+        The returned list holds a single grouped Operation, cached per
+        (<other>, Optimizer) pair, so repeated copies from the same source
+        fetch one op and add nothing to the graph.
+
+        The two ConvNets must share a Session.
+        """
+        key = (other, other.optimizer.opt_index)
+        fused = self._fused_copy_ops.get(key)
+        if fused is None:
+            ops = self._copy_ops.get(other)
+            if ops is None:
+                ops = [var.assign(other_var) for var, other_var in zip(self.net.vars, other.net.vars)]
+                self._copy_ops[other] = ops
+            hyperparam_ops = [op for mine, theirs in zip(self.hyperparams, other.hyperparams)
+                              for op in mine.get_copy_ops(theirs)]
+            fused = tf.group(*(ops + hyperparam_ops))
+            self._fused_copy_ops[key] = fused
+        return [fused]
+
+    def finish_copy(self, other: 'ConvNet') -> None:
+        """
+        Brings this ConvNet's Python-side state up to date after the
+        Operations from get_copy_ops(<other>) have been run.
+        """
+        for mine, theirs in zip(self.hyperparams, other.hyperparams):
+            mine.finish_copy(theirs)
+        self.step_num = other.step_num
+        self.update_history = list(other.update_history)
+        self.accuracy = other.accuracy
+        self.value = None
+
+    def copy_from(self, other: 'ConvNet') -> None:
+        """
+        Sets this ConvNet's value to that of <other>.
+
+        If the two ConvNets share a Session, the weights and optimizer state
+        are copied from Variable to Variable inside the graph, skipping the
+        device-to-host-to-device round-trip of set_value(other.get_value()),
+        which this method falls back on otherwise.
+        """
+        if self.sess is not other.sess:
+            self.set_value(other.get_value())
+            return
+        self.sess.run(self.get_copy_ops(other))
+        self.finish_copy(other)
+
     def get_accuracy(self) -> float:
         """
         Returns this ConvNet's accuracy score on its testing Dataset.
         """
         if self.accuracy is None:
             self.sess.run(self.test_iterator.initializer)
-            size_accuracy = 0
-            try:
-                while True:
-                    test_images, test_labels = self.sess.run(self.test_next)
-                    batch_size = test_images.shape[0]
-                    batch_accuracy = self.sess.run(self.net.accuracy,
-                                                   feed_dict={self.x: test_images, self.y_: test_labels,
-                                                              self.keep_prob.value: 1})
-                    size_accuracy += batch_size * batch_accuracy
-            except tf.errors.OutOfRangeError:
-                pass
-            self.accuracy = size_accuracy / MNIST_TEST_SIZE
+            self.accuracy = self._eval_callable() / MNIST_TEST_SIZE
             self.value = None
         return self.accuracy
 
@@ -286,38 +579,87 @@ class ConvNet(HyperparamsGraph):
         return self.get_accuracy()
 
     def _train_step(self) -> None:
-        train_images, train_labels = self.sess.run(self.train_next)
-        self.sess.run(self.optimizer.get_current_minimizer(),
-                      feed_dict={self.x: train_images, self.y_: train_labels})
+        opt_index = self.optimizer.opt_index
+        train_callable = self._train_callables.get(opt_index)
+        if train_callable is None:
+            train_callable = self.sess.make_callable(self.optimizer.get_current_minimizer(),
+                                                     feed_list=[self.handle])
+            self._train_callables[opt_index] = train_callable
+        train_callable(self.train_handle)
         self.accuracy = None
         self.value = None
         self.step_num += 1
 
     def train(self) -> None:
-        while True:
+        for _ in range(500 - self.step_num % 500):
             self._train_step()
-            if self.step_num % 500 == 0:
-                break
 
     def explore(self):
         """
         Randomly perturbs some of this ConvNet's hyperparameters.
         """
         # Ensure that at least one used hyperparameter is perturbed
-        rand = random.randrange(1, 2 ** sum(1 for hyperparam in self.hyperparams if not hyperparam.unused))
+        num_used = sum(1 for hyperparam in self.hyperparams if not hyperparam.unused)
+        rand = self.rng.randrange(1, 1 << num_used)
         perturbed_used_hyperparam = False
-        for i in range(len(self.hyperparams)):
-            hyperparam = self.hyperparams[i]
+        for i, hyperparam in enumerate(self.hyperparams):
             if perturbed_used_hyperparam or hyperparam.unused:
-                if random.random() < 0.5:
+                if self.rng.random() < 0.5:
                     hyperparam.perturb()
-            elif rand & (2 ** i) != 0:
+            elif rand & (1 << i):
                 hyperparam.perturb()
                 perturbed_used_hyperparam = True
         self.value = None
         self.record_update()
 
 
+def train_together(convnets: List[ConvNet]) -> None:
+    """
+    Performs one training run, as defined by ConvNet.train(), on each of
+    <convnets>, advancing all of them with a single Session run per training
+    step instead of one run per ConvNet per step.
+
+    All of the ConvNets must share the same Session.
+    """
+    if not convnets:
+        return
+    sess = convnets[0].sess
+    remaining = {net: 500 - net.step_num % 500 for net in convnets}
+    while remaining:
+        nets = list(remaining.keys())
+        fetches = [net.optimizer.get_current_minimizer() for net in nets]
+        feed_dict = {net.handle: net.train_handle for net in nets}
+        steps = min(remaining.values())
+        for _ in range(steps):
+            sess.run(fetches, feed_dict=feed_dict)
+        for net in nets:
+            net.step_num += steps
+            net.accuracy = None
+            net.value = None
+            remaining[net] -= steps
+            if remaining[net] == 0:
+                del remaining[net]
+
+
+def get_accuracies(convnets: List[ConvNet]) -> List[float]:
+    """
+    Returns the accuracy scores of all of <convnets> on their testing
+    Datasets, as returned by their get_accuracy() methods, evaluating every
+    ConvNet without a cached accuracy in a single pair of Session runs.
+
+    All of the ConvNets must share the same Session.
+    """
+    stale = [net for net in convnets if net.accuracy is None]
+    if stale:
+        sess = stale[0].sess
+        sess.run([net.test_iterator.initializer for net in stale])
+        totals = sess.run([net._eval_total for net in stale])
+        for net, total in zip(stale, totals):
+            net.accuracy = total / MNIST_TEST_SIZE
+            net.value = None
+    return [net.accuracy for net in convnets]
+
+
 RED = '#FF0000'
 ORANGE = '#FF8000'
 GREEN = '#008000'
@@ -334,66 +676,66 @@ _NO_DATA = []
 OPT_LINES = [Line2D(_NO_DATA, _NO_DATA, color=OPT_COLORS[opt]) for opt in OPTS]
 
 
+def _step_points(step_nums: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Returns an array of (x, y) points tracing the where='post' step curve
+    through the points (<step_nums>, <values>), suitable for use as a
+    LineCollection segment.
+    """
+    return np.column_stack((np.repeat(step_nums, 2)[1:], np.repeat(values, 2)[:-1]))
+
+
 def _plot_history_hyperparams(step_num: int, update_history: Iterable[HyperparamsUpdate], zorder: float,
                               kp_ax: Axes, opt_ax: Axes, mom_ax: Axes) -> None:
     if zorder > 1:
         colormap = IDENTITY
     else:
         colormap = LIGHTER
-    current_opt = None
-    # Keep probability data
-    kp_step_nums = []
-    kps = []
-    # Learning rate data since the optimizer last changed
-    lr_step_nums = []
-    log_lrs = []
-    # Momentum data since the optimizer last became MomentumOptimizer
-    mom_step_nums = []
-    moms = []
-    for update in update_history:
-        new_opt = update.hyperparams['Optimizer']
-        if new_opt != current_opt:
-            if current_opt is not None:
-                # Finish and plot a segment of learning rate data
-                last_log_lr = log_lrs[-1]
-                lr_step_nums.append(update.step_num)
-                log_lrs.append(last_log_lr)
-                opt_ax.step(lr_step_nums, log_lrs,
-                            colormap[OPT_COLORS[current_opt]], where='post', zorder=zorder)
-                # Start a new one
-                lr_step_nums = [update.step_num]
-                log_lrs = [last_log_lr]
-                if current_opt == 'MomentumOptimizer':
-                    # Finish and plot a segment of momentum data
-                    last_mom = moms[-1]
-                    mom_step_nums.append(update.step_num)
-                    moms.append(last_mom)
-                    mom_ax.step(mom_step_nums, moms, colormap[BLUE], where='post', zorder=zorder)
-                    # Start a new one
-                    mom_step_nums = []
-                    moms = []
-            current_opt = new_opt
-        # Add the new update to the appropriate data
-        kp_step_nums.append(update.step_num)
-        kps.append(float(update.hyperparams['Keep probability']))
-        lr_step_nums.append(update.step_num)
-        log_lrs.append(math.log(float(update.hyperparams['Learning rate']), 10))
-        if current_opt == 'MomentumOptimizer':
-            mom_step_nums.append(update.step_num)
-            moms.append(float(update.hyperparams['Momentum']))
-    # Plot the keep probability data
-    kp_step_nums.append(step_num)
-    kps.append(kps[-1])
-    kp_ax.step(kp_step_nums, kps, colormap[BLUE], where='post', zorder=zorder)
-    # Finish and plot the last segment of learning rate data
-    lr_step_nums.append(step_num)
-    log_lrs.append(log_lrs[-1])
-    opt_ax.step(lr_step_nums, log_lrs, colormap[OPT_COLORS[current_opt]], where='post', zorder=zorder)
-    if current_opt == 'MomentumOptimizer':
-        # Finish and plot the last segment of momentum data
-        mom_step_nums.append(step_num)
-        moms.append(moms[-1])
-        mom_ax.step(mom_step_nums, moms, colormap[BLUE], where='post', zorder=zorder)
+    history = list(update_history)
+    num_updates = len(history)
+    step_nums = np.fromiter((update.step_num for update in history),
+                            dtype=np.int64, count=num_updates)
+    kps = np.fromiter((update.get('Keep probability') for update in history),
+                      dtype=np.float64, count=num_updates)
+    log_lrs = np.log10(np.fromiter(
+        (update.get('Learning rate') for update in history),
+        dtype=np.float64, count=num_updates))
+    opts = np.array([update.get('Optimizer') for update in history])
+    # The keep probability data forms one step curve over the whole history
+    kp_segments = [_step_points(np.append(step_nums, step_num), np.append(kps, kps[-1]))]
+    # The learning rate and momentum data form one step curve per stretch of
+    # updates with a constant optimizer
+    lr_segments = []
+    lr_colors = []
+    mom_segments = []
+    changes = np.flatnonzero(opts[1:] != opts[:-1]) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes, [num_updates]))
+    for start, end in zip(starts, ends):
+        if end < num_updates:
+            bound_step = step_nums[end]
+        else:
+            bound_step = step_num
+        seg_steps = np.append(step_nums[start:end], bound_step)
+        seg_log_lrs = np.append(log_lrs[start:end], log_lrs[end - 1])
+        if start > 0:
+            # Carry the previous stretch's final value to the boundary step so
+            # the jump to the new value is drawn in the new stretch's color
+            seg_steps = np.insert(seg_steps, 0, step_nums[start])
+            seg_log_lrs = np.insert(seg_log_lrs, 0, log_lrs[start - 1])
+        lr_segments.append(_step_points(seg_steps, seg_log_lrs))
+        lr_colors.append(colormap[OPT_COLORS[opts[start]]])
+        if opts[start] == 'MomentumOptimizer':
+            moms = np.fromiter((history[i].get('Momentum')
+                                for i in range(start, end)),
+                               dtype=np.float64, count=end - start)
+            mom_segments.append(_step_points(np.append(step_nums[start:end], bound_step),
+                                             np.append(moms, moms[-1])))
+    # Add each plot's segments to it as a single collection
+    kp_ax.add_collection(LineCollection(kp_segments, colors=colormap[BLUE], zorder=zorder))
+    opt_ax.add_collection(LineCollection(lr_segments, colors=lr_colors, zorder=zorder))
+    if mom_segments:
+        mom_ax.add_collection(LineCollection(mom_segments, colors=colormap[BLUE], zorder=zorder))
 
 
 def plot_hyperparams(info: List[Tuple[int, List[HyperparamsUpdate], float]], peak_value, directory: str) -> None:
@@ -427,12 +769,7 @@ def plot_hyperparams(info: List[Tuple[int, List[HyperparamsUpdate], float]], pea
     mom_ax.set_xlim(0, max_step_num)
     mom_ax.set_ylim(-0.01, 1.01)
     # Add data to plots
-    peak_updates = []
-    update = peak_value[3]
-    while update is not None:
-        peak_updates.append(update)
-        update = update.prev
-    _plot_history_hyperparams(peak_value[0], reversed(peak_updates), 2, kp_ax, opt_ax, mom_ax)
+    _plot_history_hyperparams(peak_value[0], peak_value[3], 2, kp_ax, opt_ax, mom_ax)
     for graph_info in info:
         _plot_history_hyperparams(graph_info[0], graph_info[1], graph_info[2], kp_ax, opt_ax, mom_ax)
     # Save plots
@@ -5,12 +5,14 @@ If this file is run directly, the training will be executed and its results
 reported at the end.
 """
 
-import math
+from typing import List
 import datetime
+import numpy as np
 from tensorflow.models.official.mnist.dataset import train, test
 from pbt import LocalCluster
 from mnist import set_mnist_data
-from mnist_pbt import ConvNet, plot_hyperparams
+from mnist_pbt import ConvNet, get_accuracies, plot_hyperparams, train_together,\
+    truncation_selection
 
 
 class Cluster(LocalCluster[ConvNet]):
@@ -29,23 +31,36 @@ class Cluster(LocalCluster[ConvNet]):
         print('Varying Optimizers:', vary_opts)
         super().__init__(pop_size, lambda num, sess: ConvNet(num, sess, vary_opts))
 
+    def get_metrics(self) -> List[float]:
+        return get_accuracies(self.population)
+
+    def train_graphs(self, graphs: List[ConvNet]) -> None:
+        if graphs:
+            print('Graphs', [graph.num for graph in graphs], 'starting training runs')
+            train_together(graphs)
+            print('Graphs', [graph.num for graph in graphs], 'ending training runs')
+
     def exploit_and_or_explore(self) -> None:
-        accuracies = {}
-        for graph in self.population:
-            accuracy = graph.get_accuracy()
+        # The population's accuracy caches were filled after the last round of
+        # training runs, so this does not re-evaluate any graphs
+        accuracies = self.get_metrics()
+        for graph, accuracy in zip(self.population, accuracies):
             print('Graph', graph.num, 'accuracy:', accuracy)
-            accuracies[graph] = accuracy
         if len(self.population) > 1:
-            # Rank population by accuracy
-            ranked_pop = sorted(self.population, key=lambda graph: accuracies[graph])
-            # Bottom 20% copies top 20%
-            worst_graphs = ranked_pop[:math.ceil(0.2 * len(ranked_pop))]
-            best_graphs = ranked_pop[math.floor(0.8 * len(ranked_pop)):]
-            for i in range(len(worst_graphs)):
-                bad_graph = worst_graphs[i]
-                good_graph = best_graphs[i]
+            # Rank population by accuracy, ties broken by graph number; the
+            # bottom 20% copies the top 20%
+            accs = np.fromiter(accuracies, dtype=np.float64, count=len(self.population))
+            worst_nums, best_nums = truncation_selection(accs, 0.2)
+            worst_graphs = [self.population[i] for i in worst_nums]
+            best_graphs = [self.population[i] for i in best_nums]
+            copy_ops = []
+            for bad_graph, good_graph in zip(worst_graphs, best_graphs):
                 print('Graph', bad_graph.num, 'copying graph', good_graph.num)
-                bad_graph.set_value(good_graph.get_value())
+                copy_ops.extend(bad_graph.get_copy_ops(good_graph))
+            # One Session run performs every copy
+            self.sess.run(copy_ops)
+            for bad_graph, good_graph in zip(worst_graphs, best_graphs):
+                bad_graph.finish_copy(good_graph)
                 bad_graph.explore()
 
     def plot_hyperparams(self, directory: str) -> None:
@@ -73,12 +88,7 @@ if __name__ == '__main__':
     print('Accuracy:', cluster.get_peak_metric())
     print('Hyperparameter update history:')
     print()
-    peak_updates = []
-    update = peak_value[3]
-    while update is not None:
-        peak_updates.append(update)
-        update = update.prev
-    print(''.join(str(update) for update in reversed(peak_updates)))
+    print(''.join(str(update) for update in peak_value[3]))
     for graph in sorted(cluster.get_population(), key=lambda graph: -graph.get_accuracy()):
         print('Graph', graph.num)
         print('Accuracy:', graph.get_accuracy())
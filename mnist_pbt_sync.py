@@ -11,15 +11,15 @@ where <m>, an integer no less than 2, is the number of processes to use.
 
 from typing import Union, Any, List, Tuple, Dict
 from enum import Enum, auto
-from collections import OrderedDict
 import math
 from mpi4py import MPI
 import datetime
+import numpy as np
 import tensorflow as tf
 from tensorflow.models.official.mnist.dataset import train, test
 from pbt import Cluster as PBTCluster
 from mnist import set_mnist_data
-from mnist_pbt import ConvNet, plot_hyperparams
+from mnist_pbt import ConvNet, plot_hyperparams, truncation_selection
 
 
 Device = Union[str, None]
@@ -31,12 +31,14 @@ class Attribute(Enum):
     """
     STEP_NUM = auto()
     VALUE = auto()
+    SUMMARY = auto()
     UPDATE_HISTORY = auto()
     ACCURACY = auto()
 
 
 GETTERS = {Attribute.STEP_NUM: (lambda graph: graph.step_num),
            Attribute.VALUE: (lambda graph: graph.get_value()),
+           Attribute.SUMMARY: (lambda graph: graph.get_summary()),
            Attribute.UPDATE_HISTORY: (lambda graph: graph.get_update_history()),
            Attribute.ACCURACY: (lambda graph: graph.get_accuracy())
            }
@@ -62,7 +64,7 @@ def worker(comm: MPI.Comm, cluster_rank: int) -> None:
     sess = tf.Session()
     device, start_num, end_num, vary_opts = comm.recv(source=cluster_rank)
     with tf.device(device):
-        graphs = OrderedDict()
+        graphs = {}
         for num in range(start_num, end_num):
             graphs[num] = ConvNet(num, sess, vary_opts)
         while True:
@@ -173,11 +175,12 @@ class Cluster(PBTCluster[ConvNet]):
             print('Graph', num, 'accuracy:', attributes[num][1])
         new_values = {}
         if self.pop_size > 1:
-            # Rank population by accuracy
-            ranked_nums = sorted(range(self.pop_size), key=lambda num: attributes[num][1])
-            # Bottom 20% copies top 20%
-            worst_nums = ranked_nums[:math.ceil(0.2 * len(ranked_nums))]
-            best_nums = ranked_nums[math.floor(0.8 * len(ranked_nums)):]
+            # Rank population by accuracy; the bottom 20% copies the top 20%
+            accs = np.fromiter((graph_attributes[1] for graph_attributes in attributes),
+                               dtype=np.float64, count=self.pop_size)
+            worst_nums, best_nums = truncation_selection(accs, 0.2)
+            worst_nums = worst_nums.tolist()
+            best_nums = best_nums.tolist()
             best_attributes = self.get_attributes([Attribute.VALUE], best_nums)
             best_metric = attributes[-1][1]
             if self.peak_metric is None or best_metric > self.peak_metric:
@@ -226,7 +229,7 @@ class Cluster(PBTCluster[ConvNet]):
                     best_metric = attributes[best_num][1]
                     if self.peak_metric is None or best_metric > self.peak_metric:
                         self.peak_metric = best_metric
-                        self.peak_metric_value = self.get_attributes([Attribute.VALUE], [best_num])[0][0]
+                        self.peak_metric_value = self.get_attributes([Attribute.SUMMARY], [best_num])[0][0]
                 break
 
     def get_attributes(self, attribute_ids: List[Attribute], graph_nums: List[int]=None) -> List[Tuple]:
@@ -291,12 +294,7 @@ if comm.Get_rank() == 0:
     print('Accuracy:', cluster.get_peak_metric())
     print('Hyperparameter update history:')
     print()
-    peak_updates = []
-    update = peak_value[3]
-    while update is not None:
-        peak_updates.append(update)
-        update = update.prev
-    print(''.join(str(update) for update in reversed(peak_updates)))
+    print(''.join(str(update) for update in peak_value[3]))
     attributes = cluster.get_attributes(
         [Attribute.STEP_NUM, Attribute.UPDATE_HISTORY, Attribute.ACCURACY])
     for num in sorted(range(len(attributes)), key=lambda num: -attributes[num][2]):
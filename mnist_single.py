@@ -13,14 +13,20 @@ from tensorflow.models.official.mnist.dataset import train, test
 if __name__ == '__main__':
     set_mnist_data(train('MNIST_data/'), test('MNIST_data/'))
     train_data, test_data = get_mnist_data()
-    train_next = train_data.shuffle(MNIST_TRAIN_SIZE).batch(50).repeat().make_one_shot_iterator().get_next()
+    train_batches = train_data.shuffle(MNIST_TRAIN_SIZE).batch(50).repeat()\
+        .prefetch(tf.data.experimental.AUTOTUNE)
+    train_iterator = train_batches.make_one_shot_iterator()
     test_iterator = test_data.batch(MNIST_TEST_BATCH_SIZE).make_initializable_iterator()
-    test_next = test_iterator.get_next()
 
     sess = tf.Session()
 
-    x = tf.placeholder(tf.float32, [None, 784])
-    y_ = tf.placeholder(tf.int32, [None])
+    handle = tf.placeholder(tf.string, [])
+    iterator = tf.data.Iterator.from_string_handle(handle, train_batches.output_types,
+                                                   train_batches.output_shapes)
+    x, y_ = iterator.get_next()
+    train_handle = sess.run(train_iterator.string_handle())
+    test_handle = sess.run(test_iterator.string_handle())
+    num_examples = tf.size(y_)
     one_hot_y_ = tf.one_hot(y_, 10)
     keep_prob = tf.placeholder(tf.float32)
 
@@ -48,11 +54,9 @@ if __name__ == '__main__':
         size_accuracy = 0
         try:
             while True:
-                test_images, test_labels = sess.run(test_next)
-                batch_size = test_images.shape[0]
-                batch_accuracy = sess.run(net.accuracy, feed_dict={x: test_images,
-                                                                   y_: test_labels,
-                                                                   keep_prob: 1})
+                batch_accuracy, batch_size = sess.run(
+                    [net.accuracy, num_examples],
+                    feed_dict={handle: test_handle, keep_prob: 1})
                 size_accuracy += batch_size * batch_accuracy
         except tf.errors.OutOfRangeError:
             pass
@@ -65,7 +69,6 @@ if __name__ == '__main__':
             print('Step', step_num)
             if step_num % 500 == 0:
                 print_stats()
-        train_images, train_labels = sess.run(train_next)
-        sess.run(train_step, feed_dict={x: train_images, y_: train_labels, keep_prob: 1})
+        sess.run(train_step, feed_dict={handle: train_handle, keep_prob: 1})
         step_num += 1
     print_stats()
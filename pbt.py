@@ -3,9 +3,11 @@ An implementation of population-based training of neural networks for
 TensorFlow.
 """
 
-from typing import List, Callable, TypeVar, Generic
-from collections import OrderedDict
+from typing import List, Tuple, Callable, TypeVar, Generic
+from concurrent.futures import ThreadPoolExecutor
 import os
+import random
+import numpy as np
 import tensorflow as tf
 
 
@@ -59,6 +61,16 @@ class Graph:
         """
         raise NotImplementedError
 
+    def get_summary(self):
+        """
+        Returns a picklable data structure like that returned by get_value(),
+        but possibly omitting attributes that are expensive to retrieve and
+        only needed to resume training, such as model weights.
+
+        The default implementation simply returns get_value().
+        """
+        return self.get_value()
+
     def get_metric(self) -> float:
         """
         Returns a metric for this Graph, typically its accuracy, that
@@ -114,9 +126,10 @@ class Cluster(Generic[T]):
 
     def get_peak_metric_value(self):
         """
-        Returns the value according to get_value() of a Graph in this Cluster
-        when it achieved the Cluster's all-time highest metric according to
-        get_peak_metric(), or None if get_peak_metric() returns None.
+        Returns the value according to get_summary() of a Graph in this
+        Cluster when it achieved the Cluster's all-time highest metric
+        according to get_peak_metric(), or None if get_peak_metric() returns
+        None.
         """
         raise NotImplementedError
 
@@ -136,6 +149,7 @@ class LocalCluster(Generic[T], Cluster[T]):
     sess: tf.Session
     population: List[T]
     peak_metric: float
+    _pool: ThreadPoolExecutor
 
     def __init__(self, pop_size: int, graph_maker: Callable[[int, tf.Session], T]) -> None:
         """
@@ -153,6 +167,7 @@ class LocalCluster(Generic[T], Cluster[T]):
             print('Graph', num, 'created')
         self.peak_metric = None
         self.peak_metric_value = None
+        self._pool = ThreadPoolExecutor(max_workers=pop_size)
 
     def initialize_variables(self):
         for graph in self.population:
@@ -170,28 +185,48 @@ class LocalCluster(Generic[T], Cluster[T]):
 
     def train(self, until_step_num: int) -> None:
         while True:
-            keep_training = False
-            for graph in self.population:
-                if graph.step_num < until_step_num:
-                    keep_training = True
-                    if graph.step_num > 0:
-                        print('Exploiting/exploring')
-                        self.exploit_and_or_explore()
-                        print('Finished exploiting/exploring')
-                        break
-            if keep_training:
-                for graph in self.population:
-                    if graph.step_num < until_step_num:
-                        print('Graph', graph.num, 'starting training run at step', graph.step_num)
-                        graph.train()
-                        print('Graph', graph.num, 'ending training run at step', graph.step_num)
-                best_graph = max(self.population, key=lambda graph: graph.get_metric())
-                best_metric = best_graph.get_metric()
-                if self.peak_metric is None or best_metric > self.peak_metric:
-                    self.peak_metric = best_metric
-                    self.peak_metric_value = best_graph.get_value()
-            else:
+            to_train = [graph for graph in self.population if graph.step_num < until_step_num]
+            if not to_train:
                 break
+            if any(graph.step_num > 0 for graph in to_train):
+                print('Exploiting/exploring')
+                self.exploit_and_or_explore()
+                print('Finished exploiting/exploring')
+            self.train_graphs(to_train)
+            metrics = np.fromiter(self.get_metrics(), dtype=np.float64,
+                                  count=len(self.population))
+            best_index = int(metrics.argmax())
+            best_metric = float(metrics[best_index])
+            if self.peak_metric is None or best_metric > self.peak_metric:
+                self.peak_metric = best_metric
+                self.peak_metric_value = self.population[best_index].get_summary()
+
+    def get_metrics(self) -> List[float]:
+        """
+        Returns the current metrics of this LocalCluster's population, in
+        population order.
+
+        The default implementation calls each Graph's get_metric() in turn;
+        subclasses may override it to evaluate the population together more
+        efficiently.
+        """
+        return [graph.get_metric() for graph in self.population]
+
+    def train_graphs(self, graphs: List[T]) -> None:
+        """
+        Causes each of the Graphs in <graphs> to perform one training run.
+
+        The default implementation submits the training runs to a thread pool.
+        Session.run() releases the GIL, so TensorFlow can execute the Graphs'
+        disjoint subgraphs concurrently. Subclasses may override this method
+        to train the Graphs together more efficiently.
+        """
+        if not graphs:
+            return
+        print('Graphs', [graph.num for graph in graphs], 'starting training runs')
+        for future in [self._pool.submit(graph.train) for graph in graphs]:
+            future.result()
+        print('Graphs', [graph.num for graph in graphs], 'ending training runs')
 
     def exploit_and_or_explore(self) -> None:
         """
@@ -242,6 +277,16 @@ class Hyperparameter:
         """
         raise NotImplementedError
 
+    def get_recorded_value(self):
+        """
+        Returns the value that HyperparamsUpdates should record for this
+        Hyperparameter: a compact, picklable representation of its current
+        setting.
+
+        The default implementation returns str(self).
+        """
+        return str(self)
+
     def set_value(self, value) -> None:
         """
         Sets this Hyperparameter's value to that represented by <value>, a data
@@ -268,38 +313,57 @@ class HyperparamsUpdate:
     """
     Stores information about a HyperparamsGraph's update of its
     hyperparameters.
+
+    The recorded hyperparameter names and values are stored as parallel
+    tuples. Since updates that record the same Hyperparameters record the same
+    names, the names tuples are shared between HyperparamsUpdates rather than
+    stored separately in each one.
     """
 
-    prev: 'HyperparamsUpdate'
+    _shared_names = {}
+
     step_num: int
-    hyperparams: OrderedDict
+    names: Tuple[str, ...]
+    values: tuple
 
     def __init__(self, graph: 'HyperparamsGraph') -> None:
         """
         Creates a new HyperparamsUpdate that stores <graph>'s current
         information.
         """
-        self.prev = graph.last_update
         self.step_num = graph.step_num
-        self.hyperparams = OrderedDict()
-        for hyperparam in graph.hyperparams:
-            if not hyperparam.unused:
-                self.hyperparams[hyperparam.name] = str(hyperparam)
+        recorded = [hyperparam for hyperparam in graph.hyperparams if not hyperparam.unused]
+        names = tuple(hyperparam.name for hyperparam in recorded)
+        self.names = HyperparamsUpdate._shared_names.setdefault(names, names)
+        self.values = tuple(hyperparam.get_recorded_value() for hyperparam in recorded)
+
+    def get(self, name: str):
+        """
+        Returns this HyperparamsUpdate's recorded value for the Hyperparameter
+        named <name>.
+        """
+        return self.values[self.names.index(name)]
 
     def __str__(self) -> str:
-        string = 'Step ' + str(self.step_num) + os.linesep
-        for name, value in self.hyperparams.items():
-            string += name + ': ' + value + os.linesep
-        return string + os.linesep
+        lines = ['Step ' + str(self.step_num)]
+        lines.extend(name + ': ' + str(value) for name, value in zip(self.names, self.values))
+        lines.extend(('', ''))
+        return os.linesep.join(lines)
 
 
 class HyperparamsGraph(Graph):
     """
     A Graph that stores its hyperparameters as a list of Hyperparameters.
+
+    Each HyperparamsGraph has its own random number generator, rng, that it
+    and its Hyperparameters should use for all of their random sampling. This
+    gives each member of a population an independent random stream with no
+    contention over the module-level generator.
     """
 
     hyperparams: List[Hyperparameter]
-    last_update: HyperparamsUpdate
+    update_history: List[HyperparamsUpdate]
+    rng: random.Random
 
     def __init__(self, num: int, sess: tf.Session) -> None:
         """
@@ -308,7 +372,16 @@ class HyperparamsGraph(Graph):
         """
         super().__init__(num, sess)
         self.hyperparams = []
-        self.last_update = None
+        self.update_history = []
+        self.rng = random.Random()
+
+    @property
+    def last_update(self) -> HyperparamsUpdate:
+        """
+        This HyperparamsGraph's most recent HyperparamsUpdate, or None if it
+        has not recorded any.
+        """
+        return self.update_history[-1] if self.update_history else None
 
     def initialize_variables(self) -> None:
         for hyperparam in self.hyperparams:
@@ -318,18 +391,17 @@ class HyperparamsGraph(Graph):
     def record_update(self) -> None:
         """
         Records this HyperparamsGraph's current information as a new update to
-        its hyperparameters.
+        its hyperparameters, unless it would record the same names and values
+        as the most recent update, in which case the history is left alone.
         """
-        self.last_update = HyperparamsUpdate(self)
+        update = HyperparamsUpdate(self)
+        last = self.last_update
+        if last is None or update.names != last.names or update.values != last.values:
+            self.update_history.append(update)
 
     def get_update_history(self) -> List[HyperparamsUpdate]:
         """
         Returns a list of this HyperparamsGraph's HyperparamsUpdates in order
         from least to most recent.
         """
-        updates = []
-        update = self.last_update
-        while update is not None:
-            updates.append(update)
-            update = update.prev
-        return list(reversed(updates))
+        return list(self.update_history)